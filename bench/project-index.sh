@@ -0,0 +1,104 @@
+#!/bin/bash
+# project-index on a synthetic projects tree: the full walk the launchers
+# used to do on every open vs serving the index, plus an incremental refresh
+#
+# Usage: bench/project-index.sh [--cold] [groups] [repos-per-group] [runs]
+#        (default 50 groups x 40 repos, 10 runs)
+#
+# The tree mirrors PROJECTS_DIR: group dirs at depth 1, repos at depth 2,
+# each with a .git dir and some files. By default the caches are warm for
+# every variant, so the walk numbers are a lower bound. --cold also times
+# the walk and `list` with the page, dentry and inode caches dropped before
+# every run (as root, or through sudo), which is what the first launcher
+# open in a while looks like on /mnt/Storage. Put the tree on that disk
+# with BENCH_DIR=...; a tree on tmpfs has nothing to drop.
+
+cd "$(dirname "$0")/.."
+COLD=false
+[ "$1" = "--cold" ] && { COLD=true; shift; }
+GROUPS_N="${1:-50}"
+REPOS_N="${2:-40}"
+RUNS="${3:-10}"
+
+WORK=$(mktemp -d -p "${BENCH_DIR:-${TMPDIR:-/tmp}}")
+trap 'rm -rf "$WORK"' EXIT
+if $COLD; then
+    if [ "$(stat -f -c %T "$WORK")" = "tmpfs" ]; then
+        echo "$WORK is on tmpfs, so --cold has nothing to drop; set BENCH_DIR" >&2
+        exit 1
+    fi
+    SUDO=sudo
+    [ "$EUID" -eq 0 ] && SUDO=""
+    $SUDO true || exit 1
+fi
+export PROJECTS_DIR="$WORK/projects"
+export XDG_CACHE_HOME="$WORK/cache"
+
+echo "Creating $GROUPS_N x $REPOS_N repos..."
+awk -v g="$GROUPS_N" -v r="$REPOS_N" -v root="$PROJECTS_DIR" 'BEGIN {
+    for (i = 0; i < g; i++) {
+        for (j = 0; j < r; j++) {
+            repo = sprintf("%s/group%02d/repo%03d", root, i, j)
+            system("mkdir -p " repo "/.git/objects " repo "/src " repo "/docs")
+            for (k = 0; k < 20; k++) {
+                printf "" > (repo "/file" k)
+                close(repo "/file" k)
+            }
+        }
+    }
+}'
+
+# bench LABEL COMMAND...: mean wall time per run
+bench() {
+    local label="$1" i start
+    shift
+    start=$EPOCHREALTIME
+    for ((i = 0; i < RUNS; i++)); do
+        "$@" > /dev/null
+    done
+    awk -v l="$label" -v s="$start" -v e="$EPOCHREALTIME" -v n="$RUNS" 'BEGIN {
+        printf "%-32s %8.1fms\n", l, (e - s) * 1000 / n
+    }'
+}
+
+# bench_cold LABEL COMMAND...: mean wall time per run, caches dropped
+# before each run (after any background refresh has finished)
+bench_cold() {
+    local label="$1" i start total=0
+    shift
+    for ((i = 0; i < RUNS; i++)); do
+        sleep 0.1
+        flock "$XDG_CACHE_HOME"/project-index/*.lock true
+        sync
+        $SUDO sh -c 'echo 3 > /proc/sys/vm/drop_caches'
+        start=$EPOCHREALTIME
+        "$@" > /dev/null
+        total=$(awk -v t="$total" -v s="$start" -v e="$EPOCHREALTIME" 'BEGIN { print t + e - s }')
+    done
+    awk -v l="$label" -v t="$total" -v n="$RUNS" 'BEGIN {
+        printf "%-32s %8.1fms\n", l, t * 1000 / n
+    }'
+}
+
+old_walk() {
+    find "$PROJECTS_DIR" -maxdepth 3 -type d -name .git 2>/dev/null | sed 's|/\.git$||'
+}
+
+# list spawns a background refresh; only what the launcher waits for counts
+list_only() {
+    scripts/.local/bin/project-index list
+}
+
+scripts/.local/bin/project-index refresh
+echo "$(wc -l < "$XDG_CACHE_HOME"/project-index/*.index) repos indexed"
+bench "full walk (old launchers)" old_walk
+bench "project-index list" list_only
+if $COLD; then
+    bench_cold "full walk, cold caches" old_walk
+    bench_cold "project-index list, cold caches" list_only
+fi
+sleep 1   # let the background refreshes it started finish
+bench "refresh, nothing changed" scripts/.local/bin/project-index refresh
+bench "refresh, one new repo" bash -c "mkdir -p '$PROJECTS_DIR/group00/new\$RANDOM\$RANDOM/.git' && scripts/.local/bin/project-index refresh"
+bench "refresh from scratch" bash -c "rm -f '$XDG_CACHE_HOME'/project-index/*.dirs && scripts/.local/bin/project-index refresh"
+sleep 1   # let the last background refresh finish before cleanup
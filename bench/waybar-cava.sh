@@ -0,0 +1,85 @@
+#!/bin/bash
+# CPU per frame of waybar-cava: the per-frame bash loop it replaced vs the
+# current sed/awk pipeline, both fed the same cava frames
+#
+# Usage: bench/waybar-cava.sh [frames-file]
+#        bench/waybar-cava.sh --record SECONDS   (capture from the real cava)
+#
+# Frames come from the given file, else from bench/cava-frames.txt if a
+# capture was recorded, else they are generated: 60s at 60fps of 8 bars,
+# the first 10s silent (all zeros), then a random walk with a dip every 4s.
+#
+# Both scripts run unmodified with cava and playerctl stubbed on PATH; the
+# old one is kept in bench/legacy/.
+
+cd "$(dirname "$0")/.."
+FRAMES="$1"
+
+if [ "$1" = "--record" ]; then
+    timeout "${2:-60}" cava -p cava/.config/cava/config > bench/cava-frames.txt
+    echo "Recorded $(wc -l < bench/cava-frames.txt) frames to bench/cava-frames.txt"
+    exit 0
+fi
+
+WORK=$(mktemp -d)
+trap 'rm -rf "$WORK"' EXIT
+mkdir -p "$WORK/bin"
+export PATH="$WORK/bin:$PATH"
+
+if [ -z "$FRAMES" ] && [ -f bench/cava-frames.txt ]; then
+    FRAMES=bench/cava-frames.txt
+elif [ -z "$FRAMES" ]; then
+    FRAMES="$WORK/generated"
+    awk 'BEGIN {
+        srand(7)
+        for (i = 0; i < 3600; i++) {
+            line = ""
+            for (j = 0; j < 8; j++) {
+                if (i < 600) {
+                    v[j] = 0
+                } else {
+                    target = (j < 3 ? 5 : 3) + int(rand() * 3) - (i % 240 < 30 ? 3 : 0)
+                    v[j] += (target > v[j]) - (target < v[j])
+                    if (v[j] < 0) v[j] = 0
+                    if (v[j] > 7) v[j] = 7
+                }
+                line = line v[j] ";"
+            }
+            print line
+        }
+    }' > "$FRAMES"
+fi
+FRAMES=$(realpath "$FRAMES")
+
+cat > "$WORK/bin/cava" <<STUB
+#!/bin/bash
+cat "$FRAMES"
+touch "$WORK/cava-done"
+STUB
+# "status" for the old script's polling, "status --follow" for the new one,
+# which stays up until cava has played everything
+cat > "$WORK/bin/playerctl" <<STUB
+#!/bin/bash
+echo Playing
+[ "\$2" = "--follow" ] || exit 0
+while [ ! -e "$WORK/cava-done" ]; do sleep 0.1; done
+STUB
+chmod +x "$WORK/bin/cava" "$WORK/bin/playerctl"
+
+frames=$(wc -l < "$FRAMES")
+
+# bench LABEL SCRIPT: CPU time of the script and everything it forked
+bench() {
+    local cpu lines
+    rm -f "$WORK/cava-done"
+    TIMEFORMAT='%U %S'
+    cpu=$( { time bash "$2" > "$WORK/out" ; } 2>&1 | awk '{ print $1 + $2 }')
+    lines=$(grep -c playing "$WORK/out")
+    awk -v l="$1" -v c="$cpu" -v f="$frames" -v o="$lines" 'BEGIN {
+        printf "%-5s %7.3fs CPU  %7.1fus/frame  %6d lines to waybar\n", l, c, c * 1e6 / f, o
+    }'
+}
+
+echo "$frames frames from ${FRAMES/#$WORK\//}"
+bench old bench/legacy/waybar-cava
+bench new scripts/.local/bin/waybar-cava
@@ -0,0 +1,74 @@
+#!/bin/bash
+# waybar-git on a synthetic 100k-file repo: the original script (two
+# `git status` walks per tick) vs the cached one
+#
+# Usage: bench/waybar-git.sh [files] [ticks]   (default 100000 files, 10 ticks)
+#
+# Times idle ticks (nothing changed, the common case on a 5s interval) and
+# ticks right after an edit. hyprctl is stubbed so the "focused terminal"
+# sits in the repo; the old script is kept in bench/legacy/. Without
+# inotifywait the new script can't cache and rescans every tick.
+
+cd "$(dirname "$0")/.."
+FILES="${1:-100000}"
+TICKS="${2:-10}"
+
+WORK=$(mktemp -d)
+HOLDER=""
+cleanup() {
+    [ -n "$HOLDER" ] && pkill -P "$HOLDER" 2>/dev/null
+    # This run's watcher keeps its own runtime dir busy
+    for pid in $(cat "$WORK"/run/waybar-git/*.watch 2>/dev/null); do
+        kill "$pid" 2>/dev/null
+    done
+    rm -rf "$WORK"
+}
+trap cleanup EXIT
+mkdir -p "$WORK/bin" "$WORK/run" "$WORK/repo"
+export XDG_RUNTIME_DIR="$WORK/run"
+export PATH="$WORK/bin:$PATH"
+
+echo "Creating $FILES files..."
+(
+    cd "$WORK/repo" || exit 1
+    git init -q
+    awk -v n="$FILES" 'BEGIN {
+        for (i = 0; i < n; i++) {
+            if (i % 100 == 0) { dir = sprintf("d%03d/s%02d", int(i / 10000), int(i / 100) % 100); system("mkdir -p " dir) }
+            f = sprintf("%s/f%05d.txt", dir, i)
+            print i > f
+            close(f)
+        }
+    }'
+    mkdir -p build && touch build/out.o && echo build/ > .gitignore
+    git add -A
+    git -c user.name=bench -c user.email=bench@localhost commit -qm init
+)
+
+# A "terminal" whose shell sits in the repo, focused according to hyprctl
+bash -c "cd '$WORK/repo' || exit; sleep infinity & wait" &
+HOLDER=$!
+printf '#!/bin/bash\necho "{\\"pid\\": %s}"\n' "$HOLDER" > "$WORK/bin/hyprctl"
+chmod +x "$WORK/bin/hyprctl"
+sleep 0.2
+
+# bench LABEL SCRIPT [edit]: mean wall and CPU time per tick
+bench() {
+    local i start cpu
+    TIMEFORMAT='%U %S'
+    start=$EPOCHREALTIME
+    cpu=$( { time for ((i = 0; i < TICKS; i++)); do
+        [ -n "$3" ] && echo "$i" >> "$WORK/repo/d000/s00/f00000.txt"
+        bash "$2" > /dev/null
+    done ; } 2>&1 | awk '{ print $1 + $2 }')
+    awk -v l="$1" -v s="$start" -v e="$EPOCHREALTIME" -v c="$cpu" -v n="$TICKS" 'BEGIN {
+        printf "%-22s %8.1fms wall  %8.1fms CPU per tick\n", l, (e - s) * 1000 / n, c * 1000 / n
+    }'
+}
+
+command -v inotifywait &>/dev/null || echo "inotifywait not found: the new script will rescan every tick"
+bash scripts/.local/bin/waybar-git > /dev/null   # first scan, starts the watcher
+bench "old, idle" bench/legacy/waybar-git
+bench "new, idle" scripts/.local/bin/waybar-git
+bench "old, after an edit" bench/legacy/waybar-git edit
+bench "new, after an edit" scripts/.local/bin/waybar-git edit
@@ -1,12 +1,37 @@
 #!/usr/bin/env bash
 # Bootstrap a fresh Arch install from these dotfiles
 #
-# Usage: ./install.sh [--dry-run]
+# Usage: ./install.sh [--dry-run] [--jobs N] [--fresh]
+#
+# Steps run as a dependency graph: independent steps (package installs, git
+# clones, curl installers) run concurrently, up to --jobs at a time (default
+# 4). Anything that touches pacman holds a shared lock so only one package
+# transaction runs at once. Completed steps are recorded, so re-running after
+# a failure resumes where it stopped; --fresh ignores that record.
 
 set -euo pipefail
 
+usage() {
+  echo "Usage: ./install.sh [--dry-run] [--jobs N] [--fresh]"
+  exit 1
+}
+
 DRY_RUN=false
-[[ "${1:-}" == "--dry-run" ]] && DRY_RUN=true
+FRESH=false
+MAX_JOBS=4
+while [[ $# -gt 0 ]]; do
+  case "$1" in
+    --dry-run) DRY_RUN=true ;;
+    --fresh) FRESH=true ;;
+    --jobs)
+      [[ "${2:-}" =~ ^[1-9][0-9]*$ ]] || usage
+      MAX_JOBS="$2"
+      shift
+      ;;
+    *) usage ;;
+  esac
+  shift
+done
 
 DOTFILES_DIR="$(cd "$(dirname "$0")" && pwd)"
 STOW_PACKAGES=(
@@ -14,6 +39,9 @@ STOW_PACKAGES=(
   omarchy-custom spicetify systemd-user scripts btop
   fastfetch cava mise claude tmux
 )
+STATE_DIR="${XDG_STATE_HOME:-$HOME/.local/state}/dotfiles-install"
+STATE_FILE="$STATE_DIR/completed"
+PACMAN_LOCK="${TMPDIR:-/tmp}/dotfiles-install-pacman.lock"
 
 info()  { echo -e "\033[1;34m::\033[0m $*"; }
 warn()  { echo -e "\033[1;33m::\033[0m $*"; }
@@ -28,127 +56,304 @@ run() {
   fi
 }
 
-# --- Prerequisites ---
+# --- Steps ---
+# Each step_<name> runs in its own subshell with output captured to a log,
+# which is printed once the step finishes.
+
+step_yay() {
+  info "Checking for yay..."
+  if ! command -v yay >/dev/null; then
+    info "Installing yay..."
+    run bash -c '
+      tmpdir=$(mktemp -d)
+      git clone https://aur.archlinux.org/yay-bin.git "$tmpdir/yay-bin"
+      cd "$tmpdir/yay-bin"
+      makepkg -si --noconfirm
+      rm -rf "$tmpdir"
+    '
+  fi
+  ok "yay is available"
+}
 
-command -v git >/dev/null || fail "git is required"
+step_stow() {
+  info "Installing stow..."
+  run sudo pacman -S --needed --noconfirm stow
+  ok "stow installed"
+}
 
-info "Checking for yay..."
-if ! command -v yay >/dev/null; then
-  info "Installing yay..."
-  run bash -c '
-    tmpdir=$(mktemp -d)
-    git clone https://aur.archlinux.org/yay-bin.git "$tmpdir/yay-bin"
-    cd "$tmpdir/yay-bin"
-    makepkg -si --noconfirm
-    rm -rf "$tmpdir"
-  '
-fi
-ok "yay is available"
+step_explicit() {
+  info "Installing explicit packages..."
+  if [[ -f "$DOTFILES_DIR/packages/explicit.txt" ]]; then
+    run sudo pacman -S --needed --noconfirm - < "$DOTFILES_DIR/packages/explicit.txt" || warn "Some packages may have failed"
+  fi
+}
 
-# --- Stow ---
+step_aur() {
+  info "Installing AUR packages..."
+  if [[ -f "$DOTFILES_DIR/packages/aur.txt" ]]; then
+    run yay -S --needed --noconfirm - < "$DOTFILES_DIR/packages/aur.txt" || warn "Some AUR packages may have failed"
+  fi
+}
 
-info "Installing stow..."
-run sudo pacman -S --needed --noconfirm stow
-ok "stow installed"
+step_flatpak() {
+  info "Installing Flatpak apps..."
+  if [[ -f "$DOTFILES_DIR/packages/flatpak.txt" ]] && command -v flatpak >/dev/null; then
+    local apps=()
+    mapfile -t apps < <(grep -v '^[[:space:]]*$' "$DOTFILES_DIR/packages/flatpak.txt")
+    # One transaction for everything instead of one per app
+    if [[ ${#apps[@]} -gt 0 ]]; then
+      run flatpak install -y --noninteractive flathub "${apps[@]}" || warn "Some Flatpak apps may have failed"
+    fi
+  fi
+}
 
-# --- Packages ---
+step_zinit() {
+  info "Checking zinit..."
+  ZINIT_HOME="$HOME/.local/share/zinit/zinit.git"
+  if [[ ! -d "$ZINIT_HOME" ]]; then
+    info "Installing zinit..."
+    run bash -c "
+      mkdir -p \"\$(dirname $ZINIT_HOME)\"
+      git clone https://github.com/zdharma-continuum/zinit.git \"$ZINIT_HOME\"
+    "
+  fi
+  ok "zinit is available"
+}
 
-info "Installing explicit packages..."
-if [[ -f "$DOTFILES_DIR/packages/explicit.txt" ]]; then
-  run sudo pacman -S --needed --noconfirm - < "$DOTFILES_DIR/packages/explicit.txt" || warn "Some packages may have failed"
-fi
+step_tpm() {
+  info "Checking TPM..."
+  TPM_DIR="$HOME/.local/share/tmux/plugins/tpm"
+  if [[ ! -d "$TPM_DIR" ]]; then
+    info "Installing TPM..."
+    run bash -c "
+      mkdir -p \"\$(dirname $TPM_DIR)\"
+      git clone https://github.com/tmux-plugins/tpm \"$TPM_DIR\"
+    "
+  fi
+  ok "TPM is available"
+}
 
-info "Installing AUR packages..."
-if [[ -f "$DOTFILES_DIR/packages/aur.txt" ]]; then
-  run yay -S --needed --noconfirm - < "$DOTFILES_DIR/packages/aur.txt" || warn "Some AUR packages may have failed"
-fi
+step_dotfiles() {
+  info "Stowing dotfiles..."
+  for pkg in "${STOW_PACKAGES[@]}"; do
+    if [[ -d "$pkg" ]]; then
+      run stow --no-folding --adopt -t "$HOME" "$pkg" && ok "  $pkg" || warn "  $pkg failed"
+    fi
+  done
 
-info "Installing Flatpak apps..."
-if [[ -f "$DOTFILES_DIR/packages/flatpak.txt" ]] && command -v flatpak >/dev/null; then
-  while IFS= read -r app; do
-    [[ -z "$app" ]] && continue
-    run flatpak install -y flathub "$app" || warn "Failed to install $app"
-  done < "$DOTFILES_DIR/packages/flatpak.txt"
-fi
+  # Restore sanitized gitconfig (--adopt overwrites it)
+  run git checkout -- git/.gitconfig 2>/dev/null || true
+}
 
-# --- Zinit ---
+step_hooks() {
+  info "Configuring git hooks..."
+  run git config core.hooksPath .githooks
+  ok "hooks configured"
+}
 
-info "Checking zinit..."
-ZINIT_HOME="$HOME/.local/share/zinit/zinit.git"
-if [[ ! -d "$ZINIT_HOME" ]]; then
-  info "Installing zinit..."
-  run bash -c "
-    mkdir -p \"\$(dirname $ZINIT_HOME)\"
-    git clone https://github.com/zdharma-continuum/zinit.git \"$ZINIT_HOME\"
-  "
-fi
-ok "zinit is available"
-
-# --- TPM (Tmux Plugin Manager) ---
-
-info "Checking TPM..."
-TPM_DIR="$HOME/.local/share/tmux/plugins/tpm"
-if [[ ! -d "$TPM_DIR" ]]; then
-  info "Installing TPM..."
-  run bash -c "
-    mkdir -p \"\$(dirname $TPM_DIR)\"
-    git clone https://github.com/tmux-plugins/tpm \"$TPM_DIR\"
-  "
-fi
-ok "TPM is available"
+step_nvm() {
+  info "Checking nvm..."
+  export NVM_DIR="$HOME/.config/nvm"
+  if [[ ! -d "$NVM_DIR" ]]; then
+    info "Installing nvm..."
+    run bash -c 'curl -o- https://raw.githubusercontent.com/nvm-sh/nvm/v0.40.1/install.sh | bash'
+  fi
+  ok "nvm is available"
+}
 
-# --- Stow packages ---
+step_sdkman() {
+  info "Checking sdkman..."
+  if [[ ! -d "$HOME/.sdkman" ]]; then
+    info "Installing sdkman..."
+    run bash -c 'curl -s https://get.sdkman.io | bash'
+  fi
+  ok "sdkman is available"
+}
 
-info "Stowing dotfiles..."
-cd "$DOTFILES_DIR"
-for pkg in "${STOW_PACKAGES[@]}"; do
-  if [[ -d "$pkg" ]]; then
-    run stow --no-folding --adopt -t "$HOME" "$pkg" && ok "  $pkg" || warn "  $pkg failed"
+step_services() {
+  info "Enabling systemd user services..."
+  run systemctl --user daemon-reload
+  run systemctl --user enable --now elephant.service || warn "elephant.service failed"
+  run systemctl --user enable --now omarchy-battery-monitor.timer || warn "battery-monitor timer failed"
+  ok "services enabled"
+}
+
+step_theme() {
+  info "Rendering theme templates..."
+  if run "$HOME/.local/bin/omarchy-theme-engine"; then
+    ok "theme templates rendered"
+  else
+    warn "theme render failed"
   fi
-done
+}
+
+step_spicetify() {
+  info "Applying spicetify theme..."
+  if command -v spicetify >/dev/null; then
+    run spicetify config current_theme TwilightHaven 2>/dev/null || true
+    run spicetify apply 2>/dev/null || warn "spicetify apply failed (Spotify may need to be running)"
+  fi
+}
 
-# Restore sanitized gitconfig (--adopt overwrites it)
-run git checkout -- git/.gitconfig 2>/dev/null || true
+# --- Step graph ---
+# step NAME "DEPS" [pacman]. Declare steps after their dependencies.
+# The nvm/sdkman installers touch shell rc files, so they wait for stow.
+
+STEPS=()
+declare -A STEP_DEPS STEP_PACMAN STATUS STARTED PID_STEP
+step() {
+  STEPS+=("$1")
+  STEP_DEPS[$1]="$2"
+  STEP_PACMAN[$1]="${3:-}"
+  STATUS[$1]=pending
+}
 
-# --- Git hooks ---
+step yay       ""              pacman
+step stow      ""              pacman
+step explicit  ""              pacman
+step aur       "yay explicit"  pacman
+step flatpak   "explicit"
+step zinit     ""
+step tpm       ""
+step dotfiles  "stow"
+step hooks     ""
+step nvm       "dotfiles"
+step sdkman    "dotfiles"
+step services  "dotfiles aur"
+step theme     "dotfiles"
+step spicetify "dotfiles aur"
+
+# --- Runner ---
+
+# ready, wait (a dependency hasn't finished) or blocked (one failed)
+deps_state() {
+  local dep
+  for dep in ${STEP_DEPS[$1]}; do
+    case "${STATUS[$dep]}" in
+      done|resumed) ;;
+      failed|skipped) echo blocked; return ;;
+      *) echo wait; return ;;
+    esac
+  done
+  echo ready
+}
 
-info "Configuring git hooks..."
-run git config core.hooksPath .githooks
-ok "hooks configured"
+# Each step runs in its own process group (set -m), so stop_steps can take
+# down everything it started. Without job control a background job would
+# also ignore SIGINT.
+start_step() {
+  local name="$1"
+  STATUS[$name]=running
+  STARTED[$name]=$EPOCHREALTIME
+  set -m
+  (
+    if [[ -n "${STEP_PACMAN[$name]}" ]]; then
+      exec 8>"$PACMAN_LOCK"
+      flock 8
+    fi
+    "step_$name"
+  ) > "$LOG_DIR/$name.log" 2>&1 &
+  set +m
+  PID_STEP[$!]=$name
+}
 
-# --- NVM ---
+# On exit, interrupt or `fail`: nothing we started may keep running
+# detached (holding the pacman lock, writing only to its log)
+stop_steps() {
+  local pid
+  for pid in "${!PID_STEP[@]}"; do
+    kill -- "-$pid" 2>/dev/null || true
+  done
+  if [[ -n "$SUDO_KEEPALIVE" ]]; then
+    pkill -x -P "$SUDO_KEEPALIVE" sleep || true
+    kill "$SUDO_KEEPALIVE" 2>/dev/null || true
+  fi
+}
 
-info "Checking nvm..."
-export NVM_DIR="$HOME/.config/nvm"
-if [[ ! -d "$NVM_DIR" ]]; then
-  info "Installing nvm..."
-  run bash -c 'curl -o- https://raw.githubusercontent.com/nvm-sh/nvm/v0.40.1/install.sh | bash'
-fi
-ok "nvm is available"
+finish_step() {
+  local name="$1"
+  local rc="$2"
+  local elapsed
+  elapsed=$(awk -v a="${STARTED[$name]}" -v b="$EPOCHREALTIME" 'BEGIN { printf "%.1f", b - a }')
+  TIMINGS+=("$(printf '%7ss  %s' "$elapsed" "$name")")
+
+  cat "$LOG_DIR/$name.log"
+  if [[ "$rc" -eq 0 ]]; then
+    STATUS[$name]=done
+    $DRY_RUN || echo "$name" >> "$STATE_FILE"
+  else
+    STATUS[$name]=failed
+    FAILED+=("$name")
+    warn "$name failed after ${elapsed}s (exit $rc, log: $LOG_DIR/$name.log)"
+  fi
+}
 
-# --- SDKMAN ---
+command -v git >/dev/null || fail "git is required"
+cd "$DOTFILES_DIR"
 
-info "Checking sdkman..."
-if [[ ! -d "$HOME/.sdkman" ]]; then
-  info "Installing sdkman..."
-  run bash -c 'curl -s https://get.sdkman.io | bash'
+SUDO_KEEPALIVE=""
+trap stop_steps EXIT
+trap 'exit 130' INT
+trap 'exit 143' TERM
+
+if $DRY_RUN; then
+  LOG_DIR=$(mktemp -d)
+else
+  LOG_DIR="$STATE_DIR/logs"
+  mkdir -p "$LOG_DIR"
+  $FRESH && rm -f "$STATE_FILE"
+
+  # Steps run in the background with captured output, so a sudo password
+  # prompt would never be seen. Ask once up front and keep it fresh.
+  sudo -v || fail "sudo is required"
+  # Detached from our stdout (`./install.sh | tee log` would otherwise wait
+  # out its sleep) and stopped as soon as we exit
+  while true; do sudo -n true; sleep 60; done &>/dev/null &
+  SUDO_KEEPALIVE=$!
 fi
-ok "sdkman is available"
 
-# --- Systemd user services ---
+if [[ -f "$STATE_FILE" ]] && ! $FRESH; then
+  while read -r name; do
+    [[ "${STATUS[$name]:-}" == pending ]] && STATUS[$name]=resumed
+  done < "$STATE_FILE"
+  info "Resuming: skipping steps completed by the previous run"
+fi
 
-info "Enabling systemd user services..."
-run systemctl --user daemon-reload
-run systemctl --user enable --now elephant.service || warn "elephant.service failed"
-run systemctl --user enable --now omarchy-battery-monitor.timer || warn "battery-monitor timer failed"
-ok "services enabled"
+TIMINGS=()
+FAILED=()
+running=0
+while true; do
+  for name in "${STEPS[@]}"; do
+    [[ "${STATUS[$name]}" == pending ]] || continue
+    case "$(deps_state "$name")" in
+      blocked)
+        STATUS[$name]=skipped
+        warn "$name skipped (a dependency failed)"
+        ;;
+      ready)
+        if [[ $running -lt $MAX_JOBS ]]; then
+          start_step "$name"
+          running=$((running + 1))
+        fi
+        ;;
+    esac
+  done
+  [[ $running -eq 0 ]] && break
+
+  wait -n -p finished_pid && rc=0 || rc=$?
+  finish_step "${PID_STEP[$finished_pid]}" "$rc"
+  unset "PID_STEP[$finished_pid]"
+  running=$((running - 1))
+done
 
-# --- Spicetify ---
+info "Step timings:"
+printf '%s\n' "${TIMINGS[@]}"
 
-info "Applying spicetify theme..."
-if command -v spicetify >/dev/null; then
-  run spicetify config current_theme TwilightHaven 2>/dev/null || true
-  run spicetify apply 2>/dev/null || warn "spicetify apply failed (Spotify may need to be running)"
+if [[ ${#FAILED[@]} -gt 0 ]]; then
+  fail "Failed: ${FAILED[*]}. Re-run ./install.sh to resume from here."
 fi
 
+# Everything is in place; the next run should check every step again
+$DRY_RUN || rm -f "$STATE_FILE"
+
 ok "All done! Log out and back in for shell changes to take effect."
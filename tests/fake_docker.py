@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Stand-in Docker Engine API on a unix socket, for waybar-docker
+
+Usage: fake_docker.py SOCKET
+
+Starts with two containers, web (running) and db (exited). The first
+/events request replays a short script of container events, 0.3s apart,
+updating the container list as it goes, then closes the stream as a
+daemon restart would. Later /events requests stay open without events.
+Every request line is appended to SOCKET.log.
+"""
+
+import json
+import socketserver
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+
+CONTAINERS = {
+    "a1": {"Id": "a1", "State": "running", "Names": ["/web"]},
+    "b2": {"Id": "b2", "State": "exited", "Names": ["/db"]},
+}
+EVENTS = [
+    ("start", "b2", "db"),
+    ("exec_start: sh", "b2", "db"),
+    ("die", "a1", "web"),
+    ("destroy", "a1", "web"),
+]
+replayed = threading.Event()
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.0"
+
+    def address_string(self):
+        return "unix"
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def do_GET(self):
+        with open(sys.argv[1] + ".log", "a") as log:
+            log.write(self.requestline + "\n")
+        if self.path.startswith("/containers/json"):
+            body = json.dumps(list(CONTAINERS.values())).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif self.path.startswith("/events"):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            if replayed.is_set():
+                time.sleep(3600)
+            replayed.set()
+            for action, cid, name in EVENTS:
+                time.sleep(0.3)
+                if action == "start":
+                    CONTAINERS[cid]["State"] = "running"
+                elif action == "die":
+                    CONTAINERS[cid]["State"] = "exited"
+                elif action == "destroy":
+                    del CONTAINERS[cid]
+                event = {"Type": "container", "Action": action,
+                         "Actor": {"ID": cid, "Attributes": {"name": name}}}
+                self.wfile.write(json.dumps(event).encode() + b"\n")
+                self.wfile.flush()
+            time.sleep(0.3)
+        else:
+            self.send_error(404)
+
+
+class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+if __name__ == "__main__":
+    Server(sys.argv[1], Handler).serve_forever()
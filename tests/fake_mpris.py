@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Stand-in Spotify (org.mpris.MediaPlayer2.spotify) on the session bus
+
+Serves Properties.Get/GetAll for the MediaPlayer2 and Player interfaces and
+emits PropertiesChanged like a real player. Starts stopped with no track.
+Two extra Player methods drive it from the test:
+
+    TestPlay(ssss)   artist, title, album, art URL; now playing that track
+    TestPause()      pause the current track
+
+Prints "ready" once it owns the name. Reuses the wire protocol code of
+fake_systemd.py.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fake_systemd import Bus  # noqa: E402
+
+NAME = "org.mpris.MediaPlayer2.spotify"
+PATH = "/org/mpris/MediaPlayer2"
+ROOT = "org.mpris.MediaPlayer2"
+PLAYER = "org.mpris.MediaPlayer2.Player"
+PROPERTIES = "org.freedesktop.DBus.Properties"
+
+
+def main():
+    bus = Bus(os.environ["DBUS_SESSION_BUS_ADDRESS"])
+    bus.call("/org/freedesktop/DBus", "org.freedesktop.DBus", "Hello", "org.freedesktop.DBus")
+    name_request = bus.call("/org/freedesktop/DBus", "org.freedesktop.DBus", "RequestName",
+                            "org.freedesktop.DBus", "su", [NAME, 4])
+    props = {
+        ROOT: {"Identity": ("s", "Spotify"), "DesktopEntry": ("s", "spotify"),
+               "CanQuit": ("b", 1), "CanRaise": ("b", 0)},
+        PLAYER: {"PlaybackStatus": ("s", "Stopped"), "Metadata": ("a{sv}", {}),
+                 "CanControl": ("b", 1), "CanPlay": ("b", 1), "CanPause": ("b", 1),
+                 "CanGoNext": ("b", 1), "CanGoPrevious": ("b", 1)},
+    }
+    tracks = 0
+
+    def changed(**values):
+        props[PLAYER].update(values)
+        bus.signal(PATH, PROPERTIES, "PropertiesChanged", "sa{sv}as", [PLAYER, values, []])
+
+    while True:
+        msg = bus.receive()
+        if msg["type"] == 2 and msg.get("reply_serial") == name_request:
+            print("ready", flush=True)
+        elif msg["type"] != 1:
+            continue
+        elif msg.get("interface") == PROPERTIES and msg.get("member") == "GetAll":
+            bus.reply(msg, "a{sv}", [props.get(msg["body"][0], {})])
+        elif msg.get("interface") == PROPERTIES and msg.get("member") == "Get":
+            interface, prop = msg["body"]
+            if prop in props.get(interface, {}):
+                bus.reply(msg, "v", [props[interface][prop]])
+            else:
+                bus.error(msg, "org.freedesktop.DBus.Error.InvalidArgs")
+        elif msg.get("interface") == "org.freedesktop.DBus.Peer" and msg.get("member") == "Ping":
+            bus.reply(msg)
+        elif msg.get("interface") == PLAYER and msg.get("member") == "TestPlay":
+            artist, title, album, art_url = msg["body"]
+            tracks += 1
+            changed(PlaybackStatus=("s", "Playing"), Metadata=("a{sv}", {
+                "mpris:trackid": ("o", "/com/spotify/track/%d" % tracks),
+                "xesam:artist": ("as", [artist]),
+                "xesam:title": ("s", title),
+                "xesam:album": ("s", album),
+                "mpris:artUrl": ("s", art_url),
+            }))
+            bus.reply(msg)
+        elif msg.get("interface") == PLAYER and msg.get("member") == "TestPause":
+            changed(PlaybackStatus=("s", "Paused"))
+            bus.reply(msg)
+        else:
+            bus.error(msg, "org.freedesktop.DBus.Error.UnknownMethod")
+
+
+if __name__ == "__main__":
+    main()
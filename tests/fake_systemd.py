@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""Stand-in org.freedesktop.systemd1 on the session bus, for waybar-systemd
+
+Serves Manager.ListUnitsFiltered and Subscribe/Unsubscribe. Like systemd,
+it only emits unit PropertiesChanged signals while some client is
+subscribed, and forgets a subscriber when its connection goes away.
+Two extra Manager methods drive it from the test:
+
+    TestSetFailed(as)   replace the set of failed units
+    TestSubscribers()   number of current subscribers (u)
+
+Prints "ready" once it owns the name. Speaks the D-Bus wire protocol with
+the standard library only (little-endian, the subset used here).
+"""
+
+import os
+import socket
+import struct
+import sys
+
+MANAGER = "org.freedesktop.systemd1.Manager"
+ALIGN = {"y": 1, "b": 4, "u": 4, "i": 4, "s": 4, "o": 4, "g": 1, "a": 4,
+         "(": 8, "{": 8, "v": 1}
+
+
+def split_types(sig):
+    """Split a signature into its complete types"""
+    types, i = [], 0
+    while i < len(sig):
+        j = type_end(sig, i)
+        types.append(sig[i:j])
+        i = j
+    return types
+
+
+def type_end(sig, i):
+    if sig[i] == "a":
+        return type_end(sig, i + 1)
+    if sig[i] in "({":
+        depth = 0
+        for j in range(i, len(sig)):
+            depth += sig[j] in "({"
+            depth -= sig[j] in ")}"
+            if depth == 0:
+                return j + 1
+    return i + 1
+
+
+def pad(buf, n):
+    buf += b"\0" * (-len(buf) % n)
+
+
+def encode(buf, t, v):
+    c = t[0]
+    pad(buf, ALIGN[c])
+    if c == "y":
+        buf += bytes([v])
+    elif c in "bu":
+        buf += struct.pack("<I", v)
+    elif c == "i":
+        buf += struct.pack("<i", v)
+    elif c in "so":
+        data = v.encode()
+        buf += struct.pack("<I", len(data)) + data + b"\0"
+    elif c == "g":
+        buf += bytes([len(v)]) + v.encode() + b"\0"
+    elif c == "v":
+        encode(buf, "g", v[0])
+        encode(buf, v[0], v[1])
+    elif c == "a":
+        at = len(buf)
+        buf += b"\0\0\0\0"
+        pad(buf, ALIGN[t[1]])
+        start = len(buf)
+        items = v.items() if t[1] == "{" else v
+        for item in items:
+            encode(buf, t[1:], item)
+        struct.pack_into("<I", buf, at, len(buf) - start)
+    else:
+        for sub, item in zip(split_types(t[1:-1]), v):
+            encode(buf, sub, item)
+
+
+def decode(buf, pos, t):
+    """Return (value, new position); offsets are from the message start"""
+    c = t[0]
+    pos += -pos % ALIGN[c]
+    if c == "y":
+        return buf[pos], pos + 1
+    if c in "bu":
+        return struct.unpack_from("<I", buf, pos)[0], pos + 4
+    if c == "i":
+        return struct.unpack_from("<i", buf, pos)[0], pos + 4
+    if c in "so":
+        n = struct.unpack_from("<I", buf, pos)[0]
+        return buf[pos + 4:pos + 4 + n].decode(), pos + 5 + n
+    if c == "g":
+        n = buf[pos]
+        return buf[pos + 1:pos + 1 + n].decode(), pos + 2 + n
+    if c == "v":
+        sig, pos = decode(buf, pos, "g")
+        return decode(buf, pos, sig)
+    if c == "a":
+        n = struct.unpack_from("<I", buf, pos)[0]
+        pos += 4
+        pos += -pos % ALIGN[t[1]]
+        end, items = pos + n, []
+        while pos < end:
+            item, pos = decode(buf, pos, t[1:])
+            items.append(item)
+        return (dict(items) if t[1] == "{" else items), pos
+    items = []
+    for sub in split_types(t[1:-1]):
+        item, pos = decode(buf, pos, sub)
+        items.append(item)
+    return tuple(items), pos
+
+
+class Bus:
+    def __init__(self, address):
+        opts = dict(p.split("=", 1) for p in address.split(":", 1)[1].split(","))
+        path = opts["path"] if "path" in opts else "\0" + opts["abstract"]
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(path)
+        self.sock.sendall(b"\0AUTH EXTERNAL " + str(os.getuid()).encode().hex().encode() + b"\r\n")
+        assert self.sock.recv(4096).startswith(b"OK")
+        self.sock.sendall(b"BEGIN\r\n")
+        self.serial = 0
+        self.buf = b""
+
+    def send(self, mtype, fields, sig="", body=()):
+        self.serial += 1
+        payload = bytearray()
+        for t, v in zip(split_types(sig), body):
+            encode(payload, t, v)
+        if sig:
+            fields = fields + [(8, ("g", sig))]
+        msg = bytearray(b"l" + bytes([mtype, 0, 1]))
+        msg += struct.pack("<II", len(payload), self.serial)
+        encode(msg, "a(yv)", fields)
+        pad(msg, 8)
+        self.sock.sendall(bytes(msg + payload))
+        return self.serial
+
+    def call(self, path, interface, member, destination, sig="", body=()):
+        return self.send(1, [(1, ("o", path)), (2, ("s", interface)),
+                             (3, ("s", member)), (6, ("s", destination))], sig, body)
+
+    def reply(self, msg, sig="", body=()):
+        self.send(2, [(5, ("u", msg["serial"])), (6, ("s", msg["sender"]))], sig, body)
+
+    def error(self, msg, name):
+        self.send(3, [(4, ("s", name)), (5, ("u", msg["serial"])),
+                      (6, ("s", msg["sender"]))])
+
+    def signal(self, path, interface, member, sig, body):
+        self.send(4, [(1, ("o", path)), (2, ("s", interface)),
+                      (3, ("s", member))], sig, body)
+
+    def receive(self):
+        while True:
+            if len(self.buf) >= 16:
+                body_len, serial, fields_len = struct.unpack_from("<III", self.buf, 4)
+                header_len = 16 + fields_len + (-(16 + fields_len) % 8)
+                if len(self.buf) >= header_len + body_len:
+                    raw, self.buf = self.buf[:header_len + body_len], self.buf[header_len + body_len:]
+                    fields, _ = decode(raw, 12, "a(yv)")
+                    names = {1: "path", 2: "interface", 3: "member", 5: "reply_serial",
+                             7: "sender", 8: "signature"}
+                    msg = {names[k]: v for k, v in fields if k in names}
+                    msg.update(type=raw[1], serial=serial)
+                    body, pos = [], header_len
+                    for t in split_types(msg.get("signature", "")):
+                        item, pos = decode(raw, pos, t)
+                        body.append(item)
+                    msg["body"] = body
+                    return msg
+            data = self.sock.recv(65536)
+            if not data:
+                sys.exit(0)
+            self.buf += data
+
+
+def unit_path(unit):
+    return "/org/freedesktop/systemd1/unit/" + "".join(
+        c if c.isalnum() else "_%02x" % ord(c) for c in unit)
+
+
+def main():
+    bus = Bus(os.environ["DBUS_SESSION_BUS_ADDRESS"])
+    bus.call("/org/freedesktop/DBus", "org.freedesktop.DBus", "Hello", "org.freedesktop.DBus")
+    bus.call("/org/freedesktop/DBus", "org.freedesktop.DBus", "AddMatch", "org.freedesktop.DBus",
+             "s", ["type='signal',sender='org.freedesktop.DBus',member='NameOwnerChanged'"])
+    name_request = bus.call("/org/freedesktop/DBus", "org.freedesktop.DBus", "RequestName",
+                            "org.freedesktop.DBus", "su", ["org.freedesktop.systemd1", 4])
+    failed, subscribers = [], set()
+
+    while True:
+        msg = bus.receive()
+        if msg["type"] == 2 and msg.get("reply_serial") == name_request:
+            print("ready", flush=True)
+        elif msg["type"] == 4 and msg.get("member") == "NameOwnerChanged":
+            name, _, new_owner = msg["body"]
+            if not new_owner:
+                subscribers.discard(name)
+        elif msg["type"] == 1 and msg.get("interface") == MANAGER:
+            member = msg.get("member")
+            if member == "ListUnitsFiltered":
+                units = [(u, u, "loaded", "failed", "failed", "", unit_path(u), 0, "", "/")
+                         for u in failed]
+                bus.reply(msg, "a(ssssssouso)", [units])
+            elif member == "Subscribe":
+                subscribers.add(msg["sender"])
+                bus.reply(msg)
+            elif member == "Unsubscribe":
+                subscribers.discard(msg["sender"])
+                bus.reply(msg)
+            elif member == "TestSubscribers":
+                bus.reply(msg, "u", [len(subscribers)])
+            elif member == "TestSetFailed":
+                new = sorted(set(msg["body"][0]))
+                changed = sorted(set(failed) ^ set(new))
+                failed = new
+                if subscribers:
+                    for unit in changed:
+                        state = "failed" if unit in failed else "active"
+                        bus.signal(unit_path(unit), "org.freedesktop.DBus.Properties",
+                                   "PropertiesChanged", "sa{sv}as",
+                                   ["org.freedesktop.systemd1.Unit",
+                                    {"ActiveState": ("s", state)}, []])
+                bus.reply(msg)
+            else:
+                bus.error(msg, "org.freedesktop.DBus.Error.UnknownMethod")
+        elif msg["type"] == 1:
+            bus.error(msg, "org.freedesktop.DBus.Error.UnknownMethod")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# Shared helpers for the scripts in tests/
+# Source it, set up stubs with `stub`, assert with `check` (polling with
+# `wait_for` where the result arrives asynchronously), end with `finish`.
+# Everything runs in a scratch dir that's removed on exit.
+
+ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+BIN="$ROOT/scripts/.local/bin"
+SCRATCH=$(mktemp -d)
+STUBS="$SCRATCH/stubs"
+PASSED=0
+FAILED=0
+mkdir -p "$STUBS"
+export PATH="$STUBS:$PATH"
+
+cleanup() {
+    local pids
+    pids=$(jobs -p)
+    [ -n "$pids" ] && kill $pids 2>/dev/null
+    wait 2>/dev/null
+    rm -rf "$SCRATCH"
+}
+trap cleanup EXIT
+
+# stub NAME BODY: put a fake NAME command first on PATH
+stub() {
+    printf '#!/bin/bash\n%s\n' "$2" > "$STUBS/$1"
+    chmod +x "$STUBS/$1"
+}
+
+# check DESCRIPTION COMMAND...: record whether COMMAND succeeds
+check() {
+    local desc="$1"
+    shift
+    if "$@"; then
+        PASSED=$((PASSED + 1))
+        echo "ok   $desc"
+    else
+        FAILED=$((FAILED + 1))
+        echo "FAIL $desc"
+    fi
+}
+
+# wait_for SECONDS COMMAND...: poll until COMMAND succeeds
+wait_for() {
+    local i
+    for ((i = 0; i < $1 * 10; i++)); do
+        "${@:2}" && return 0
+        sleep 0.1
+    done
+    return 1
+}
+
+finish() {
+    echo "$PASSED passed, $FAILED failed"
+    [ "$FAILED" -eq 0 ]
+}
@@ -0,0 +1,26 @@
+#!/bin/bash
+# Run every test script in tests/ and report which ones failed
+#
+# Usage: tests/run.sh [name...]   e.g. tests/run.sh spotify-notify
+
+cd "$(dirname "$0")"
+
+if [ $# -gt 0 ]; then
+    tests=("${@/%/.sh}")
+else
+    tests=()
+    for t in *.sh; do
+        [ "$t" = "lib.sh" ] || [ "$t" = "run.sh" ] || tests+=("$t")
+    done
+fi
+
+failed=()
+for t in "${tests[@]}"; do
+    echo "== $t"
+    bash "$t" || failed+=("$t")
+done
+
+if [ ${#failed[@]} -gt 0 ]; then
+    echo "Failed: ${failed[*]}"
+    exit 1
+fi
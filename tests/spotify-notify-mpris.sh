@@ -0,0 +1,108 @@
+#!/bin/bash
+# spotify-notify against a stand-in Spotify on a private session bus
+#
+# tests/fake_mpris.py owns org.mpris.MediaPlayer2.spotify on a
+# dbus-run-session bus and the real playerctl follows it. waybar is a stub
+# process that logs every SIGRTMIN+9 it gets; notify-send logs its calls.
+
+if [ -z "$DBUS_TEST_SESSION" ]; then
+    for tool in dbus-run-session busctl playerctl; do
+        command -v "$tool" &>/dev/null || { echo "skipped: $tool not installed"; exit 0; }
+    done
+    DBUS_TEST_SESSION=1 exec dbus-run-session -- bash "$0" "$@" 2>/dev/null
+fi
+
+source "$(dirname "$0")/lib.sh"
+
+export HOME="$SCRATCH/home"
+export XDG_RUNTIME_DIR="$SCRATCH/run"
+mkdir -p "$HOME" "$XDG_RUNTIME_DIR"
+BAR="$XDG_RUNTIME_DIR/spotify-notify/waybar.json"
+NOTIFICATIONS="$SCRATCH/notifications"
+SIGNALS="$SCRATCH/signals"
+: > "$NOTIFICATIONS"
+
+stub notify-send "
+echo \"\$*\" >> '$NOTIFICATIONS'
+[ \"\$1\" = -p ] && echo 42
+exit 0"
+stub waybar "
+trap 'echo >> $SIGNALS' RTMIN+9
+: > $SIGNALS
+while :; do sleep 0.1; done"
+
+spotify() {
+    busctl --user call org.mpris.MediaPlayer2.spotify /org/mpris/MediaPlayer2 \
+        org.mpris.MediaPlayer2.Player "$@"
+}
+# play ARTIST TITLE ALBUM
+play() { spotify TestPlay ssss "$@" ""; }
+
+bar_has() { grep -qF "$1" "$BAR" 2>/dev/null; }
+signals() { wc -l < "$SIGNALS"; }
+# The stub only runs its trap between sleeps
+signalled() { [ "$(signals)" -eq "$1" ]; }
+# One notify-send call per entry; the body spans two lines
+notifications() { grep -c '^-' "$NOTIFICATIONS"; }
+notified() { grep -qF "$1" "$NOTIFICATIONS"; }
+not_notified() { ! grep -qF "$1" "$NOTIFICATIONS"; }
+
+python3 "$ROOT/tests/fake_mpris.py" > "$SCRATCH/fake.out" &
+wait_for 5 grep -q ready "$SCRATCH/fake.out"
+waybar &
+wait_for 5 test -e "$SIGNALS"
+
+bash "$BIN/spotify-notify" &
+NOTIFY=$!
+wait_for 5 pgrep -x playerctl >/dev/null
+check "starts out stopped" wait_for 3 bar_has '"class": "stopped"'
+sleep 1
+
+# --- Bar updates ---
+
+before=$(signals)
+play Artist "Song 1" Album >/dev/null
+check "shows the playing track" wait_for 3 bar_has '"text": "  Artist - Song 1"'
+check "signals waybar on play" wait_for 2 signalled $((before + 1))
+check "notifies about the new track" wait_for 3 notified "Song 1"
+
+# Same artist and title, other album: playerctl prints a new line but the
+# module renders the same
+inode=$(stat -c %i "$BAR")
+before=$(signals)
+play Artist "Song 1" "Deluxe Edition" >/dev/null
+sleep 1
+check "leaves the bar file alone when the module is unchanged" [ "$(stat -c %i "$BAR")" = "$inode" ]
+check "does not signal waybar when the module is unchanged" signalled "$before"
+check "does not notify about the same track twice" [ "$(notifications)" -eq 1 ]
+
+before=$(signals)
+spotify TestPause >/dev/null
+check "shows the player as paused" wait_for 3 bar_has '"class": "paused"'
+check "signals waybar on pause" wait_for 2 signalled $((before + 1))
+
+play Artist "Song 2" Album >/dev/null
+check "shows the next track" wait_for 3 bar_has '"text": "  Artist - Song 2"'
+check "notifies about the next track" wait_for 3 notified "Song 2"
+
+# --- Debounce ---
+
+play Artist "Song 3" Album >/dev/null
+play Artist "Song 4" Album >/dev/null
+play Artist "Song 5" Album >/dev/null
+check "notifies about the track that stuck" wait_for 3 notified "Song 5"
+sleep 1
+check "skipped tracks produce one notification" [ "$(notifications)" -eq 3 ]
+check "never notifies about a skipped track" not_notified "Song 3"
+check "never notifies about another skipped track" not_notified "Song 4"
+
+# --- Listener exit ---
+
+play Artist "Song 6" Album >/dev/null
+wait_for 3 bar_has "Song 6"
+pkill -x playerctl
+wait "$NOTIFY"
+check "sends a pending notification when playerctl exits" notified "Song 6"
+check "clears the bar when playerctl exits" bar_has '"class": "stopped"'
+
+finish
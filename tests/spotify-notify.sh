@@ -0,0 +1,114 @@
+#!/bin/bash
+# spotify-notify album art cache against a local HTTP stand-in
+#
+# playerctl and notify-send are stubs; art is served by python's
+# http.server, plus /late/ paths that answer only after the debounce and a
+# /slow path that sends half an image and stalls.
+
+source "$(dirname "$0")/lib.sh"
+
+export HOME="$SCRATCH/home"
+export XDG_RUNTIME_DIR="$SCRATCH/run"
+export ART_TIMEOUT=1
+CACHE="$HOME/.cache/spotify-notify"
+WWW="$SCRATCH/www"
+mkdir -p "$HOME" "$XDG_RUNTIME_DIR" "$WWW"
+
+# 20KB images; b is a byte-for-byte copy of a served from another URL
+for img in a c d; do
+    head -c 20000 /dev/urandom > "$WWW/$img.jpg"
+done
+cp "$WWW/a.jpg" "$WWW/b.jpg"
+
+python3 - "$WWW" "$SCRATCH/port" <<'PY' &>/dev/null &
+import functools, http.server, sys, time
+
+class Handler(http.server.SimpleHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith("/late/"):
+            time.sleep(0.8)
+            self.path = self.path[len("/late"):]
+        if self.path != "/slow":
+            return super().do_GET()
+        self.send_response(200)
+        self.send_header("Content-Length", "20000")
+        self.end_headers()
+        self.wfile.write(b"x" * 1000)
+        self.wfile.flush()
+        time.sleep(5)
+
+server = http.server.ThreadingHTTPServer(
+    ("127.0.0.1", 0), functools.partial(Handler, directory=sys.argv[1]))
+with open(sys.argv[2], "w") as f:
+    f.write(str(server.server_address[1]))
+server.serve_forever()
+PY
+for _ in $(seq 50); do [ -s "$SCRATCH/port" ] && break; sleep 0.1; done
+URL="http://127.0.0.1:$(cat "$SCRATCH/port")"
+
+# playerctl replays $SCRATCH/tracks, one event per second so every track
+# outlives the debounce and its art fetch finishes before the next one
+stub playerctl "
+while IFS= read -r line; do
+    printf '%s\n' \"\$line\"
+    sleep 1
+done < '$SCRATCH/tracks'
+sleep 1"
+stub notify-send "
+echo \"\$*\" >> '$SCRATCH/notifications'
+[ \"\$1\" = -p ] && echo 42
+exit 0"
+
+# play URL...: one Playing event per art URL, then wait for spotify-notify
+play() {
+    local i=0 url
+    : > "$SCRATCH/tracks"
+    : > "$SCRATCH/notifications"
+    for url in "$@"; do
+        i=$((i + 1))
+        printf 'Playing\tArtist\tTrack %s\tAlbum\t%s\n' "$i" "$url" >> "$SCRATCH/tracks"
+    done
+    bash "$BIN/spotify-notify"
+    # Art fetches run in the background; let the last one settle
+    for _ in $(seq 30); do
+        [ -z "$(ls -A "$CACHE/tmp" 2>/dev/null)" ] && break
+        sleep 0.1
+    done
+}
+
+objects() { find "$CACHE/objects" -type f | wc -l; }
+object_for() { readlink -f "$CACHE/urls/$(printf '%s' "$1" | md5sum | cut -d' ' -f1)"; }
+same_file() { cmp -s "$1" "$2"; }
+
+# --- Hits, misses and atomic rename ---
+
+play "$URL/a.jpg" "$URL/late/b.jpg" "$URL/a.jpg" "$URL/slow"
+
+check "counts hits and misses" [ "$(cat "$CACHE/stats")" = "hits=1 misses=3" ]
+check "stores identical art once" [ "$(objects)" -eq 1 ]
+check "maps both URLs to the same object" \
+    [ "$(object_for "$URL/a.jpg")" = "$(object_for "$URL/late/b.jpg")" ]
+check "cached object matches the download" same_file "$(object_for "$URL/a.jpg")" "$WWW/a.jpg"
+check "prefetches art while the track settles" grep -q "^-i $CACHE/objects/.* Track 1" "$SCRATCH/notifications"
+check "replaces the notification once late art lands" grep -q -- "-r 42 -i $CACHE/objects/.* Track 2" "$SCRATCH/notifications"
+check "serves a hit straight from the cache" grep -q "^-i $CACHE/objects/.* Track 3" "$SCRATCH/notifications"
+check "drops a stalled download" [ ! -e "$CACHE/urls/$(printf '%s' "$URL/slow" | md5sum | cut -d' ' -f1)" ]
+check "leaves no partial files behind" [ -z "$(ls -A "$CACHE/tmp")" ]
+check "never promotes a partial download" \
+    [ -z "$(find "$CACHE/objects" -type f ! -size 20000c)" ]
+
+# --- LRU eviction ---
+
+rm -rf "$CACHE"
+export ART_CACHE_MAX_KB=50
+# a, c, a again (a hit, so a is now the most recent), d: three 20KB
+# objects exceed the cap, and c is the least recently used
+play "$URL/a.jpg" "$URL/c.jpg" "$URL/a.jpg" "$URL/d.jpg"
+
+check "evicts down to the cap" [ "$(du -sk "$CACHE/objects" | cut -f1)" -le 50 ]
+check "evicts the least recently used object" [ ! -e "$CACHE/urls/$(printf '%s' "$URL/c.jpg" | md5sum | cut -d' ' -f1)" ]
+check "keeps the recently used object" same_file "$(object_for "$URL/a.jpg")" "$WWW/a.jpg"
+check "keeps the newest object" same_file "$(object_for "$URL/d.jpg")" "$WWW/d.jpg"
+check "counts the LRU run" [ "$(cat "$CACHE/stats")" = "hits=1 misses=3" ]
+
+finish
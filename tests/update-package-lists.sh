@@ -0,0 +1,102 @@
+#!/bin/bash
+# update-package-lists.sh with fake pacman/flatpak and a fake local db
+#
+# The script runs from a copy in a scratch repo dir; PACMAN_DB and
+# FLATPAK_DIRS point at scratch dirs and every pacman call is logged.
+
+source "$(dirname "$0")/lib.sh"
+
+REPO="$SCRATCH/repo"
+DB="$SCRATCH/db"
+FLATPAK="$SCRATCH/flatpak"
+mkdir -p "$REPO/packages" "$DB" "$FLATPAK"
+cp "$ROOT/update-package-lists.sh" "$REPO/"
+export PACMAN_DB="$DB"
+export FLATPAK_DIRS="$FLATPAK"
+export XDG_CACHE_HOME="$SCRATCH/cache"
+
+# The fake db: one dir with a desc file per installed package
+install_pkg() {
+    mkdir -p "$DB/$1-1.0-1"
+    echo "%NAME%" > "$DB/$1-1.0-1/desc"
+}
+
+# A name in $SCRATCH/installing gets installed while -Qqe is answered,
+# as if another pacman transaction finished mid-query
+stub pacman "
+echo \"\$*\" >> '$SCRATCH/pacman.log'
+case \"\$1\" in
+    -Qqe)
+        cat '$SCRATCH/explicit'
+        if [ -s '$SCRATCH/installing' ]; then
+            pkg=\$(cat '$SCRATCH/installing')
+            mkdir -p '$DB'/\$pkg-1.0-1 && echo %NAME% > '$DB'/\$pkg-1.0-1/desc
+            echo \$pkg >> '$SCRATCH/explicit'
+            : > '$SCRATCH/installing'
+        fi ;;
+    -Qqm) cat '$SCRATCH/foreign' ;;
+esac"
+stub flatpak "cat '$SCRATCH/flatpaks'"
+
+# Unsorted on purpose, and with names that contain each other
+printf '%s\n' libfoo foo zsh bar foo-git git > "$SCRATCH/explicit"
+printf '%s\n' foo-git foo > "$SCRATCH/foreign"
+printf '%s\n' org.example.App > "$SCRATCH/flatpaks"
+for pkg in libfoo foo zsh bar foo-git git; do
+    install_pkg "$pkg"
+done
+
+update() {
+    : > "$SCRATCH/pacman.log"
+    bash "$REPO/update-package-lists.sh" "$@" > "$SCRATCH/out"
+}
+refreshed() { [ -s "$SCRATCH/pacman.log" ]; }
+skipped() { ! refreshed && grep -q "up to date" "$SCRATCH/out"; }
+list_is() { [ "$(paste -sd' ' "$REPO/packages/$1.txt")" = "$2" ]; }
+
+update
+check "first run queries pacman" refreshed
+check "AUR list is sorted" list_is aur "foo foo-git"
+check "explicit list drops exactly the AUR names" list_is explicit "bar git libfoo zsh"
+check "flatpak list" list_is flatpak "org.example.App"
+
+update
+check "skips when nothing changed" skipped
+
+echo "hand edit" > "$REPO/packages/aur.txt"
+update
+check "refreshes after a list was edited" refreshed
+check "restores the edited list" list_is aur "foo foo-git"
+
+rm "$REPO/packages/flatpak.txt"
+update
+check "refreshes after a list was removed" refreshed
+
+update
+check "skips again afterwards" skipped
+
+install_pkg ripgrep
+echo ripgrep >> "$SCRATCH/explicit"
+update
+check "refreshes after an install" refreshed
+check "picks up the new package" list_is explicit "bar git libfoo ripgrep zsh"
+
+echo htop > "$SCRATCH/installing"
+update --force
+check "misses a package installed mid-query" list_is explicit "bar git libfoo ripgrep zsh"
+update
+check "refreshes after an install that raced the query" refreshed
+check "picks up the racing package" list_is explicit "bar git htop libfoo ripgrep zsh"
+
+touch -d '+1 minute' "$DB/zsh-1.0-1/desc"
+update
+check "refreshes after an install reason change" refreshed
+
+touch -d '+1 minute' "$FLATPAK"
+update
+check "refreshes after a flatpak change" refreshed
+
+update --force
+check "--force always refreshes" refreshed
+
+finish
@@ -0,0 +1,59 @@
+#!/bin/bash
+# waybar-docker against a stand-in Engine API socket (tests/fake_docker.py)
+
+source "$(dirname "$0")/lib.sh"
+
+SOCK="$SCRATCH/docker.sock"
+OUT="$SCRATCH/out"
+export DOCKER_HOST="unix://$SOCK"
+
+line() { sed -n "${1}p" "$OUT"; }
+has_lines() { [ "$(wc -l < "$OUT")" -ge "$1" ]; }
+line_has() { line "$1" | grep -qF "$2"; }
+
+python3 "$ROOT/tests/fake_docker.py" "$SOCK" &
+FAKE=$!
+wait_for 5 test -S "$SOCK"
+
+bash "$BIN/waybar-docker" > "$OUT" &
+
+# Listing, then start db, exec_start (ignored), die web, destroy web, the
+# stream closing (daemon restart) and a fresh listing after reconnecting
+check "produces every state" wait_for 10 has_lines 6
+check "lists the running container" line_has 1 '"text": "󰡨 1", "tooltip": "Running: web\nTotal: 2 containers"'
+check "applies start events" line_has 2 'Running: db, web\nTotal: 2 containers'
+check "applies die events" line_has 3 '"text": "󰡨 1", "tooltip": "Running: db\nTotal: 2 containers"'
+check "applies destroy events" line_has 4 'Running: db\nTotal: 1 containers'
+check "shows the daemon as stopped when the stream ends" line_has 5 '"class": "stopped"'
+check "reconnects with a fresh listing" line_has 6 'Running: db\nTotal: 1 containers'
+sleep 0.5
+check "prints only on change" [ "$(wc -l < "$OUT")" -eq 6 ]
+check "subscribes from the listing time" grep -q '^GET /events?since=[0-9]*&filters=' "$SOCK.log"
+
+kill "$FAKE"
+rm -f "$SOCK"
+check "shows the daemon as stopped when it goes away" wait_for 5 has_lines 7
+check "says so once" line_has 7 '"class": "stopped"'
+sleep 1.5
+check "stays stopped while the socket is gone" [ "$(wc -l < "$OUT")" -eq 7 ]
+
+# Any other endpoint goes through the docker CLI, stubbed here to forward
+# to a second stand-in the way the real one would reach a remote daemon
+REMOTE="$SCRATCH/remote.sock"
+python3 "$ROOT/tests/fake_docker.py" "$REMOTE" &
+wait_for 5 test -S "$REMOTE"
+stub docker "echo \"\$*\" >> '$SCRATCH/docker.log'
+case \$1 in
+    ps) curl -sf --unix-socket '$REMOTE' 'http://localhost/containers/json?all=1' |
+            jq -r '.[] | [.Id, .State, (.Names[0] | ltrimstr(\"/\"))] | @tsv' ;;
+    events) curl -sfN --unix-socket '$REMOTE' 'http://localhost/events' ;;
+esac"
+OUT="$SCRATCH/out-remote"
+DOCKER_HOST=tcp://build-box:2375 bash "$BIN/waybar-docker" > "$OUT" &
+
+check "follows a remote daemon through the CLI" wait_for 10 has_lines 6
+check "lists remote containers" line_has 1 'Running: web\nTotal: 2 containers'
+check "applies remote events" line_has 4 'Running: db\nTotal: 1 containers'
+check "asks the CLI for full ids" grep -q '^ps -a --no-trunc' "$SCRATCH/docker.log"
+
+finish
@@ -0,0 +1,54 @@
+#!/bin/bash
+# waybar-systemd against a stand-in systemd on a private session bus
+#
+# tests/fake_systemd.py owns org.freedesktop.systemd1 on a dbus-run-session
+# bus and, like systemd, only signals unit changes to subscribed clients,
+# so updates can only come from the script's own subscription. The system
+# bus points nowhere.
+
+if [ -z "$DBUS_TEST_SESSION" ]; then
+    for tool in dbus-run-session busctl jq; do
+        command -v "$tool" &>/dev/null || { echo "skipped: $tool not installed"; exit 0; }
+    done
+    python3 -c 'import gi' 2>/dev/null || { echo "skipped: python-gobject not installed"; exit 0; }
+    DBUS_TEST_SESSION=1 exec dbus-run-session -- bash "$0" "$@" 2>/dev/null
+fi
+
+source "$(dirname "$0")/lib.sh"
+
+export DBUS_SYSTEM_BUS_ADDRESS="unix:path=$SCRATCH/no-system-bus"
+OUT="$SCRATCH/out"
+
+fake() {
+    busctl --user call org.freedesktop.systemd1 /org/freedesktop/systemd1 \
+        org.freedesktop.systemd1.Manager "$@"
+}
+set_failed() { fake TestSetFailed as $# "$@"; }
+subscribers() { fake TestSubscribers | cut -d' ' -f2; }
+
+last_line_has() { tail -n 1 "$OUT" 2>/dev/null | grep -qF "$1"; }
+subscribed() { [ "$(subscribers)" = "$1" ]; }
+
+python3 "$ROOT/tests/fake_systemd.py" > "$SCRATCH/fake.out" &
+wait_for 5 grep -q ready "$SCRATCH/fake.out"
+set_failed a.service
+
+# Own process group, so it can be stopped the way waybar stops it
+setsid bash "$BIN/waybar-systemd" > "$OUT" &
+BAR=$!
+
+check "lists failed units at start" wait_for 5 last_line_has '"text": "󰚌 1"'
+check "holds a subscription" wait_for 5 subscribed 1
+
+set_failed a.service b.service
+check "picks up a new failure right away" wait_for 3 last_line_has '"text": "󰚌 2"'
+check "lists both units in the tooltip" last_line_has 'a.service\n  b.service'
+
+set_failed
+check "clears once units recover" wait_for 3 last_line_has "All services healthy"
+check "prints only on change" [ "$(wc -l < "$OUT")" -eq 3 ]
+
+kill -- -"$BAR" 2>/dev/null
+check "drops the subscription on exit" wait_for 3 subscribed 0
+
+finish
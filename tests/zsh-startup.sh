@@ -0,0 +1,85 @@
+#!/bin/bash
+# shell/.zshrc startup in a scratch HOME
+#
+# zoxide, atuin and starship are stubs that log each call and print a
+# one-line init script. omarchy's aliases/functions and zinit.zsh are empty
+# stand-ins (zinit's turbo mode never fires in `zsh -i -c`), so this covers
+# the .zshrc itself: cached init scripts, profiling, the sdkman PATH shim,
+# _compinit_daily and the time to an interactive shell.
+
+command -v zsh &>/dev/null || { echo "skipped: zsh not installed"; exit 0; }
+
+source "$(dirname "$0")/lib.sh"
+
+export HOME="$SCRATCH/home"
+export XDG_CACHE_HOME="$HOME/.cache"
+unset ZDOTDIR ZSH_PROFILE
+CACHE="$XDG_CACHE_HOME/zsh"
+CALLS="$SCRATCH/calls"
+mkdir -p "$HOME/.local/share/omarchy/default/bash" "$HOME/.local/share/zinit/zinit.git"
+touch "$HOME/.local/share/omarchy/default/bash/"{aliases,functions}
+echo 'zinit() { : }' > "$HOME/.local/share/zinit/zinit.git/zinit.zsh"
+ln -s "$ROOT/shell/.zshrc" "$HOME/.zshrc"
+mkdir -p "$HOME/.sdkman/candidates/java/current/bin"
+: > "$CALLS"
+
+# init_stub NAME VERSION: NAME's init script sets INIT_<NAME>=VERSION
+init_stub() {
+    stub "$1" "echo \"$1 \$*\" >> '$CALLS'
+echo 'typeset -g INIT_$1=$2'"
+}
+init_stub zoxide v1
+init_stub atuin v1
+init_stub starship v1
+
+# Run an interactive zsh; aliases from .zshrc (cat, grep, ls) apply to CMD
+run_zsh() { zsh -i -c "$1" 2>/dev/null < /dev/null; }
+calls() { grep -c "^$1 " "$CALLS"; }
+cached() {
+    [ -s "$CACHE/init-zoxide.zsh" ] && [ -s "$CACHE/init-atuin.zsh" ] &&
+        [ -s "$CACHE/init-starship.zsh" ]
+}
+# called ZOXIDE ATUIN: how often each init ran so far
+called() { [ "$(calls zoxide)" -eq "$1" ] && [ "$(calls atuin)" -eq "$2" ]; }
+
+out=$(run_zsh 'print $INIT_zoxide $INIT_atuin $INIT_starship')
+check "sources every tool's init script" [ "$out" = "v1 v1 v1" ]
+check "caches the init scripts" cached
+check "caches starship's full init" grep -q "^starship init zsh --print-full-init$" "$CALLS"
+
+run_zsh exit
+check "serves init scripts from the cache" called 1 1
+
+init_stub zoxide v2-upgraded
+out=$(run_zsh 'print $INIT_zoxide')
+check "regenerates after the binary changes" [ "$out" = "v2-upgraded" ]
+check "regenerates only the changed tool" called 2 1
+
+# Same size and mtime, new inode: what a package upgrade that keeps the
+# build-time mtime looks like
+cp -p "$STUBS/zoxide" "$SCRATCH/zoxide.new"
+mv -f "$SCRATCH/zoxide.new" "$STUBS/zoxide"
+run_zsh exit
+check "regenerates after the binary is replaced in place" called 3 1
+
+out=$(run_zsh 'print $JAVA_HOME; print $path[1]')
+check "puts sdkman candidates on PATH" \
+    [ "$out" = "$HOME/.sdkman/candidates/java/current"$'\n'"$HOME/.sdkman/candidates/java/current/bin" ]
+
+run_zsh '_compinit_daily'
+check "_compinit_daily writes a dump" [ -s "$HOME/.zcompdump" ]
+touch -d '2 days ago' "$HOME/.zcompdump"
+run_zsh '_compinit_daily'
+check "_compinit_daily renews a day-old dump" [ -z "$(find "$HOME/.zcompdump" -mmin +60)" ]
+
+# Segment lines are "<time>ms  <name>"
+ZSH_PROFILE=1 zsh -i -c exit 2>/dev/null < /dev/null | \
+    sed -nE 's/^ *[0-9]+\.[0-9]ms  //p' > "$SCRATCH/segments"
+for segment in "omarchy aliases/functions" zinit "plugins (deferred)" \
+    "zoxide/atuin/starship init" fzf/dart "sdkman (deferred)" total; do
+    check "ZSH_PROFILE prints $segment" grep -qxF "$segment" "$SCRATCH/segments"
+done
+
+check "starts within the budget" bash "$BIN/zsh-startup-check" 5
+
+finish
@@ -1,4 +1,4 @@
-# tmux theme - generated by omarchy-theme-set
+# tmux theme - generated by omarchy-theme-engine
 
 # Status bar
 set -g status-style "bg={{ background }},fg={{ foreground }}"
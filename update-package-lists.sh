@@ -1,14 +1,68 @@
 #!/usr/bin/env bash
 # Refresh package lists from the current system
+#
+# Usage: ./update-package-lists.sh [--force]
+#
+# Skips all work when neither the pacman local database nor the flatpak
+# install dirs changed since the last run, and the lists are still the ones
+# it wrote (tracked by a stamp of those mtimes, taken before querying, and
+# the hashes of the lists written; a pull, checkout or hand edit changes
+# the lists too). --force always refreshes.
 
 set -euo pipefail
 cd "$(dirname "$0")"
 
-pacman -Qqe | grep -v "$(pacman -Qqm)" > packages/explicit.txt
-pacman -Qqm > packages/aur.txt
+PACMAN_DB="${PACMAN_DB:-/var/lib/pacman/local}"
+FLATPAK_DIRS=(${FLATPAK_DIRS:-/var/lib/flatpak/app $HOME/.local/share/flatpak/app})
+STAMP_FILE="${XDG_CACHE_HOME:-$HOME/.cache}/dotfiles/package-lists.stamp"
+LISTS=(packages/explicit.txt packages/aur.txt packages/flatpak.txt)
+
+FORCE=false
+[[ "${1:-}" == "--force" ]] && FORCE=true
+
+START=$EPOCHREALTIME
+elapsed_ms() {
+  awk -v a="$1" -v b="$EPOCHREALTIME" 'BEGIN { printf "%d", (b - a) * 1000 }'
+}
+
+# Package dirs come and go on install/upgrade/removal, and each desc file
+# is rewritten when the install reason changes (pacman -D)
+system_stamp() {
+  {
+    find "$PACMAN_DB" -maxdepth 2 -name desc -printf '%T@ %h\n' 2>/dev/null || true
+    stat -c '%Y %n' "${FLATPAK_DIRS[@]}" 2>/dev/null || true
+  } | LC_ALL=C sort | md5sum | cut -d' ' -f1
+}
+
+# A missing list drops out of the sha256sum output, which changes it too
+lists_stamp() {
+  sha256sum "${LISTS[@]}" 2>/dev/null | md5sum | cut -d' ' -f1
+}
+
+# Taken before querying: a package installed while we query moves the
+# database past this stamp, so the next run refreshes again
+SYSTEM_STAMP=$(system_stamp)
+if ! $FORCE && [[ -f "$STAMP_FILE" && "$(< "$STAMP_FILE")" == "$SYSTEM_STAMP $(lists_stamp)" ]]; then
+  echo "Package lists up to date (no package changes, checked in $(elapsed_ms "$START")ms)"
+  exit 0
+fi
+
+t=$EPOCHREALTIME
+pacman -Qqm | LC_ALL=C sort > packages/aur.txt
+# Explicit minus AUR, as an exact set difference
+pacman -Qqe | LC_ALL=C sort | LC_ALL=C comm -23 - packages/aur.txt > packages/explicit.txt
+PACMAN_MS=$(elapsed_ms "$t")
+
+t=$EPOCHREALTIME
 flatpak list --app --columns=application 2>/dev/null > packages/flatpak.txt || true
+FLATPAK_MS=$(elapsed_ms "$t")
+
+# Stamp what was just written, so any later change to the lists shows up
+mkdir -p "$(dirname "$STAMP_FILE")"
+echo "$SYSTEM_STAMP $(lists_stamp)" > "$STAMP_FILE"
 
 echo "Updated:"
 echo "  $(wc -l < packages/explicit.txt) explicit packages"
 echo "  $(wc -l < packages/aur.txt) AUR packages"
 echo "  $(wc -l < packages/flatpak.txt) flatpak apps"
+echo "Took $(elapsed_ms "$START")ms (pacman ${PACMAN_MS}ms, flatpak ${FLATPAK_MS}ms)"